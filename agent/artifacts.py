@@ -1,7 +1,8 @@
 import csv
 import json
 import os
-from typing import List, Dict
+import sqlite3
+from typing import Iterator, List, Dict, Tuple
 from .schemas import Lead, MessagePack
 
 
@@ -18,6 +19,83 @@ def write_outreach_pack(path: str, leads: List[Lead], packs: Dict[str, MessagePa
         json.dump(items, f, indent=2)
 
 
+# Flat one-row-per-variant layout shared by the columnar and SQLite sinks
+PACK_COLUMNS = [
+    "campaign",
+    "email",
+    "first_name",
+    "last_name",
+    "company",
+    "role",
+    "industry",
+    "stage",
+    "source",
+    "variant",
+    "subject",
+    "body",
+    "followup_1",
+    "followup_2",
+]
+
+SQLITE_INDEXED_COLUMNS = ["email", "company", "industry", "stage"]
+
+
+def _pack_rows(campaign: str, leads: List[Lead], packs: Dict[str, MessagePack]) -> Iterator[Tuple]:
+    for lead in leads:
+        pack = packs[lead.email]
+        for variant, subject, body in [("A", pack.subject_A, pack.body_A), ("B", pack.subject_B, pack.body_B)]:
+            yield (
+                campaign,
+                lead.email,
+                lead.first_name,
+                lead.last_name,
+                lead.company,
+                lead.role,
+                lead.industry,
+                lead.stage,
+                lead.source,
+                variant,
+                subject,
+                body,
+                pack.followup_1,
+                pack.followup_2,
+            )
+
+
+def write_outreach_parquet(path: str, campaign: str, leads: List[Lead], packs: Dict[str, MessagePack]) -> bool:
+    # pyarrow is optional; returns False when it is not installed
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return False
+    columns = list(zip(*_pack_rows(campaign, leads, packs))) or [[] for _ in PACK_COLUMNS]
+    table = pa.table({name: pa.array(values, type=pa.string()) for name, values in zip(PACK_COLUMNS, columns)})
+    pq.write_table(table, path)
+    return True
+
+
+def write_outreach_sqlite(path: str, campaign: str, leads: List[Lead], packs: Dict[str, MessagePack]) -> None:
+    # Append-friendly: each campaign replaces only its own rows
+    conn = sqlite3.connect(path)
+    try:
+        with conn:
+            column_defs = ", ".join(f"{c} TEXT NOT NULL" for c in PACK_COLUMNS)
+            conn.execute(
+                f"CREATE TABLE IF NOT EXISTS outreach_packs ({column_defs}, PRIMARY KEY (campaign, email, variant))"
+            )
+            for column in SQLITE_INDEXED_COLUMNS:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS idx_outreach_packs_{column} ON outreach_packs ({column})")
+            conn.execute("DELETE FROM outreach_packs WHERE campaign = ?", (campaign,))
+            placeholders = ", ".join("?" for _ in PACK_COLUMNS)
+            conn.executemany(
+                f"INSERT INTO outreach_packs ({', '.join(PACK_COLUMNS)}) VALUES ({placeholders})",
+                _pack_rows(campaign, leads, packs),
+            )
+    finally:
+        conn.close()
+
+
 def write_instantly_csv(path: str, leads: List[Lead], packs: Dict[str, MessagePack]) -> None:
     headers = [
         "email",
@@ -136,6 +214,11 @@ def write_campaign_plan(path: str, campaign: str) -> None:
         f.write(content)
 
 
+def write_run_metrics(path: str, metrics: Dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(metrics, f, indent=2)
+
+
 def ensure_dirs(out_dir: str) -> None:
     os.makedirs(out_dir, exist_ok=True)
     os.makedirs(os.path.join(out_dir, "logs"), exist_ok=True)
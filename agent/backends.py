@@ -0,0 +1,276 @@
+import logging
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+import requests
+
+
+DEFAULT_OPENAI_URL = "https://api.openai.com/v1"
+
+logger = logging.getLogger("capital_scout")
+
+
+class BackendBusy(RuntimeError):
+    pass
+
+
+class BackendError(RuntimeError):
+    pass
+
+
+class _RateLimiter:
+    # Token bucket shared by every caller of one backend (all campaigns in watch mode)
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60.0
+        self.capacity = max(1.0, self.rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, block: bool) -> bool:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return True
+                wait = (1 - self.tokens) / self.rate
+            if not block:
+                return False
+            time.sleep(wait)
+
+
+def _token_usage(usage: Dict) -> Tuple[int, int, int]:
+    # OpenAI reports prefix-cache hits under prompt_tokens_details; other servers may omit it
+    details = usage.get("prompt_tokens_details") or {}
+    return (
+        int(usage.get("prompt_tokens") or 0),
+        int(details.get("cached_tokens") or 0),
+        int(usage.get("completion_tokens") or 0),
+    )
+
+
+class UsageTracker:
+    # Per-run request/token counters, so runs sharing one router report only their own usage
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.backends: Dict[str, Dict[str, int]] = {}
+
+    def record(self, name: str, usage: Optional[Dict] = None, failed: bool = False) -> None:
+        prompt, cached, completion = _token_usage(usage or {})
+        with self._lock:
+            counters = self.backends.setdefault(
+                name,
+                {"requests": 0, "errors": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0},
+            )
+            counters["requests"] += 1
+            counters["errors"] += int(failed)
+            counters["prompt_tokens"] += prompt
+            counters["cached_tokens"] += cached
+            counters["completion_tokens"] += completion
+
+
+class ChatBackend:
+    # One OpenAI-compatible chat completions endpoint (OpenAI, llama.cpp, vLLM, ...)
+    def __init__(
+        self,
+        name: str,
+        base_url: str,
+        model: str,
+        api_key_env: Optional[str] = None,
+        max_concurrency: int = 4,
+        timeout: float = 30,
+        cooldown: float = 30,
+        requests_per_minute: Optional[float] = None,
+    ):
+        self.name = name
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.api_key_env = api_key_env
+        self.timeout = timeout
+        self.cooldown = cooldown
+        self.session = requests.Session()
+        self._slots = threading.BoundedSemaphore(max(1, int(max_concurrency)))
+        self._limiter = _RateLimiter(float(requests_per_minute)) if requests_per_minute else None
+        self._lock = threading.Lock()
+        self.latency_ewma: Optional[float] = None
+        self.consecutive_failures = 0
+        self.cooldown_until = 0.0
+        self.requests = 0
+        self.errors = 0
+        self.prompt_tokens = 0
+        self.cached_tokens = 0
+        self.completion_tokens = 0
+
+    def is_available(self) -> bool:
+        # Backends that need a key are skipped until the key is configured
+        return not self.api_key_env or bool(os.getenv(self.api_key_env))
+
+    def in_cooldown(self, now: float) -> bool:
+        return now < self.cooldown_until
+
+    def score(self) -> float:
+        # Lower is better: observed latency, penalised by recent consecutive failures
+        latency = self.latency_ewma if self.latency_ewma is not None else 1.0
+        return latency * (1 + self.consecutive_failures)
+
+    def _record_success(self, elapsed: float, usage: Dict) -> None:
+        prompt, cached, completion = _token_usage(usage)
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+            self.prompt_tokens += prompt
+            self.cached_tokens += cached
+            self.completion_tokens += completion
+            if self.latency_ewma is None:
+                self.latency_ewma = elapsed
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * elapsed
+
+    def _record_failure(self, elapsed: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self.errors += 1
+            self.consecutive_failures += 1
+            # Errors count as a full timeout so fast failures (refused, 429/500) never look quick
+            penalty = max(elapsed, self.timeout)
+            if self.latency_ewma is None:
+                self.latency_ewma = penalty
+            else:
+                self.latency_ewma = 0.8 * self.latency_ewma + 0.2 * penalty
+            if self.consecutive_failures >= 2:
+                self.cooldown_until = time.monotonic() + self.cooldown
+
+    def complete(self, payload: Dict, block: bool = False, tracker: Optional[UsageTracker] = None) -> Dict:
+        # Take the slot before the token so a busy backend never burns rate-limit budget
+        if not self._slots.acquire(blocking=block):
+            raise BackendBusy(f"{self.name} is at its concurrency limit")
+        if self._limiter is not None and not self._limiter.acquire(block):
+            self._slots.release()
+            raise BackendBusy(f"{self.name} is at its rate limit")
+        start = time.monotonic()
+        try:
+            headers = {"Content-Type": "application/json"}
+            if self.api_key_env:
+                headers["Authorization"] = f"Bearer {os.getenv(self.api_key_env, '')}"
+            resp = self.session.post(
+                f"{self.base_url}/chat/completions",
+                headers=headers,
+                json={**payload, "model": self.model},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception:
+            self._record_failure(time.monotonic() - start)
+            if tracker is not None:
+                tracker.record(self.name, failed=True)
+            raise
+        finally:
+            self._slots.release()
+        self._record_success(time.monotonic() - start, data.get("usage") or {})
+        if tracker is not None:
+            tracker.record(self.name, data.get("usage"))
+        return data
+
+    def metrics(self) -> Dict:
+        with self._lock:
+            return {
+                "name": self.name,
+                "model": self.model,
+                "requests": self.requests,
+                "errors": self.errors,
+                "latency_ewma_s": round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+                "prompt_tokens": self.prompt_tokens,
+                "cached_tokens": self.cached_tokens,
+                "completion_tokens": self.completion_tokens,
+            }
+
+
+class BackendRouter:
+    def __init__(self, backends: List[ChatBackend]):
+        if not backends:
+            raise ValueError("BackendRouter needs at least one backend")
+        self.backends = backends
+
+    def _tiers(self) -> List[List[ChatBackend]]:
+        # Healthy backends by score; cooling-down ones are a separate, last-resort tier
+        now = time.monotonic()
+        healthy = sorted((b for b in self.backends if not b.in_cooldown(now)), key=lambda b: b.score())
+        cooling = sorted((b for b in self.backends if b.in_cooldown(now)), key=lambda b: b.cooldown_until)
+        return [healthy, cooling]
+
+    def complete(self, payload: Dict, tracker: Optional[UsageTracker] = None) -> Dict:
+        errors = []
+        for tier in self._tiers():
+            busy = []
+            for backend in tier:
+                try:
+                    return backend.complete(payload, tracker=tracker)
+                except BackendBusy:
+                    busy.append(backend)
+                except Exception as exc:
+                    logger.debug(
+                        "Backend %s failed: %s",
+                        backend.name,
+                        exc,
+                        extra={"backend": backend.name, "reason": str(exc)},
+                    )
+                    errors.append(f"{backend.name}: {exc}")
+            # Saturated or rate limited: wait for a slot here before falling back to cooling backends
+            for backend in busy:
+                try:
+                    return backend.complete(payload, block=True, tracker=tracker)
+                except Exception as exc:
+                    errors.append(f"{backend.name}: {exc}")
+        raise BackendError("All backends failed: " + "; ".join(errors))
+
+    def metrics(self, tracker: Optional[UsageTracker] = None) -> Dict:
+        # With a tracker, counters cover only that run; latency stays the shared routing estimate
+        backends = [b.metrics() for b in self.backends]
+        if tracker is not None:
+            empty = {"requests": 0, "errors": 0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0}
+            for item in backends:
+                item.update(tracker.backends.get(item["name"], empty))
+        prompt_tokens = sum(b["prompt_tokens"] for b in backends)
+        cached_tokens = sum(b["cached_tokens"] for b in backends)
+        return {
+            "backends": backends,
+            "prompt_tokens": prompt_tokens,
+            "cached_tokens": cached_tokens,
+            "cached_token_ratio": round(cached_tokens / prompt_tokens, 4) if prompt_tokens else 0.0,
+        }
+
+
+def build_router(settings: Dict) -> Optional[BackendRouter]:
+    configs = settings.get("backends")
+    if not configs:
+        # Legacy single-backend config: OpenAI with the top-level model
+        configs = [
+            {
+                "name": "openai",
+                "base_url": DEFAULT_OPENAI_URL,
+                "model": settings.get("model", "gpt-4o-mini"),
+                "api_key_env": "OPENAI_API_KEY",
+            }
+        ]
+    backends = []
+    for cfg in configs:
+        backend = ChatBackend(
+            name=cfg.get("name") or cfg["base_url"],
+            base_url=cfg.get("base_url", DEFAULT_OPENAI_URL),
+            model=cfg.get("model") or settings.get("model", "gpt-4o-mini"),
+            api_key_env=cfg.get("api_key_env"),
+            max_concurrency=cfg.get("max_concurrency", 4),
+            timeout=cfg.get("timeout", 30),
+            cooldown=cfg.get("cooldown", 30),
+            requests_per_minute=cfg.get("requests_per_minute"),
+        )
+        if backend.is_available():
+            backends.append(backend)
+    if not backends:
+        return None
+    return BackendRouter(backends)
@@ -1,16 +1,107 @@
+import atexit
+import json
 import logging
+import logging.handlers
 import os
+import queue
+from typing import Dict
 
 
-def setup_logger(log_path: str) -> logging.Logger:
+# Structured fields callers may pass via `extra=` (emitted as JSON keys)
+STRUCTURED_FIELDS = ("lead_email", "attempt", "latency_ms", "reason", "backend")
+
+_listeners: Dict[str, "_QueueListener"] = {}
+
+
+class JsonLineFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        item = {
+            "ts": self.formatTime(record),
+            "level": record.levelname,
+            "message": record.getMessage(),
+        }
+        for field in STRUCTURED_FIELDS:
+            value = getattr(record, field, None)
+            if value is not None:
+                item[field] = value
+        return json.dumps(item, ensure_ascii=False)
+
+
+class _DroppingQueueHandler(logging.handlers.QueueHandler):
+    # Drop INFO/DEBUG records instead of blocking the hot path when the writer falls behind;
+    # WARNING and above block so failure reasons always reach the log
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        if record.levelno >= logging.WARNING:
+            self.queue.put(record)
+            return
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    # The stop sentinel must not be dropped even when the queue is full
+    def enqueue_sentinel(self) -> None:
+        self.queue.put(self._sentinel)
+
+
+def shutdown_logger(logger: logging.Logger) -> None:
+    # Flush queued records to disk and close the file handler
+    listener = _listeners.pop(logger.name, None)
+    if listener is None:
+        return
+    listener.stop()
+    dropped = sum(h.dropped for h in logger.handlers if isinstance(h, _DroppingQueueHandler))
+    for handler in listener.handlers:
+        if dropped:
+            handler.handle(
+                logger.makeRecord(
+                    logger.name, logging.WARNING, __file__, 0, "Dropped %d log records (queue full)", (dropped,), None
+                )
+            )
+        handler.close()
+
+
+def _shutdown_all() -> None:
+    for name in list(_listeners):
+        shutdown_logger(logging.getLogger(name))
+
+
+atexit.register(_shutdown_all)
+
+
+def setup_logger(
+    log_path: str,
+    max_bytes: int = 10 * 1024 * 1024,
+    backup_count: int = 5,
+    json_format: bool = False,
+    queue_size: int = 10000,
+    level: str = "INFO",
+) -> logging.Logger:
     os.makedirs(os.path.dirname(log_path), exist_ok=True)
     logger = logging.getLogger("capital_scout")
-    logger.setLevel(logging.INFO)
+    shutdown_logger(logger)
+    logger.setLevel(level.upper() if isinstance(level, str) else level)
     logger.handlers.clear()
 
-    fh = logging.FileHandler(log_path, encoding="utf-8")
-    fmt = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-    fh.setFormatter(fmt)
-    logger.addHandler(fh)
+    # File I/O happens on the listener thread; callers only enqueue
+    fh = logging.handlers.RotatingFileHandler(
+        log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+    )
+    if json_format:
+        fh.setFormatter(JsonLineFormatter())
+    else:
+        fh.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+
+    log_queue: queue.Queue = queue.Queue(maxsize=queue_size)
+    listener = _QueueListener(log_queue, fh, respect_handler_level=True)
+    listener.start()
+    _listeners[logger.name] = listener
+    logger.addHandler(_DroppingQueueHandler(log_queue))
 
     return logger
@@ -1,11 +1,17 @@
 import json
+import logging
 import os
-from typing import Dict
-import requests
+import time
+from functools import lru_cache
+from typing import Dict, Optional, Tuple
+from .backends import BackendRouter, UsageTracker
 from .schemas import Lead, MessagePack
 from .validators import validate_message_pack
 
 
+logger = logging.getLogger("capital_scout")
+
+
 def _demo_pack(lead: Lead) -> MessagePack:
     # Deterministic placeholder copy for demos and dry-run mode
     base = (
@@ -22,72 +28,131 @@ def _demo_pack(lead: Lead) -> MessagePack:
     )
 
 
-def _build_prompt(lead: Lead, buzzwords) -> str:
-    # Prompt forces JSON-only output with strict constraints
+@lru_cache(maxsize=8)
+def _system_prompt(word_limit: int, buzzwords: Tuple[str, ...]) -> str:
+    # Static instructions rendered once per run; identical bytes on every request
+    # let provider-side prompt caching reuse the prefix
     return (
-        "You are an outreach assistant. Return ONLY valid JSON with keys: "
+        "You write concise outreach messages. Return ONLY valid JSON with keys: "
         "subject_A, body_A, subject_B, body_B, followup_1, followup_2. "
-        "Constraints: body_A and body_B <= 120 words, no emojis, use only ASCII characters, "
-        f"no buzzwords: {buzzwords}. Tone: warm, respectful, direct, non-salesy. "
+        f"Constraints: body_A and body_B <= {word_limit} words, no emojis, use only ASCII characters, "
+        f"no buzzwords: {', '.join(buzzwords)}. Tone: warm, respectful, direct, non-salesy. "
         "Goal: invite a short intro conversation. No meta commentary. "
+        "Return only JSON with double quotes and no trailing text. "
+        "Each user message contains the lead fields to personalize for."
+    )
+
+
+def build_system_prompt(settings: Dict) -> str:
+    word_limit = int(settings.get("word_limit", 120))
+    buzzwords = tuple(settings.get("buzzwords", []))
+    return _system_prompt(word_limit, buzzwords)
+
+
+@lru_cache(maxsize=4)
+def _cached_winners(path: str, mtime: float) -> Dict:
+    # mtime is part of the key so a re-ingest is picked up by long-running processes
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _variant_winners(settings: Dict) -> Dict:
+    path = settings.get("variant_winners")
+    if not path or not os.path.exists(path):
+        return {}
+    return _cached_winners(path, os.path.getmtime(path))
+
+
+def _build_prompt(lead: Lead, winners: Optional[Dict] = None) -> str:
+    # Small per-lead suffix; keep all static text in the system prompt
+    prompt = (
         f"Lead: first_name={lead.first_name}, last_name={lead.last_name}, role={lead.role}, "
         f"company={lead.company}, industry={lead.industry}, stage={lead.stage}."
     )
+    if winners:
+        # Winning A/B style for this lead's segment from ingested campaign results
+        segment_by = winners.get("segment_by", "industry")
+        winner = (winners.get("winners") or {}).get(getattr(lead, segment_by, ""))
+        if winner:
+            prompt += (
+                f" In past outreach to this {segment_by}, subjects like \"{winner['subject']}\" "
+                "got the most replies; match that style without reusing its names."
+            )
+    return prompt
 
 
-def _build_strict_prompt(lead: Lead, buzzwords) -> str:
-    # Tighter instruction for retry attempts
+def _build_strict_prompt(lead: Lead, winners: Optional[Dict] = None) -> str:
+    # Tighter instruction for retry attempts, appended after the lead so the prefix stays cacheable
     return (
-        _build_prompt(lead, buzzwords)
-        + " Return only JSON with double quotes and no trailing text. Any emoji or non-ASCII character makes the response invalid."
+        _build_prompt(lead, winners)
+        + " Any emoji or non-ASCII character makes the response invalid."
     )
 
 
-def generate_message_pack(lead: Lead, settings: Dict, dry_run: bool = False) -> MessagePack:
+def generate_message_pack(
+    lead: Lead,
+    settings: Dict,
+    dry_run: bool = False,
+    router: Optional[BackendRouter] = None,
+    tracker: Optional[UsageTracker] = None,
+) -> MessagePack:
     # DRY_RUN skips any external calls and always returns demo copy
     if dry_run:
         return _demo_pack(lead)
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
+    if router is None:
+        # Callers build one router per run with build_router(); None means no backend
+        # is usable (e.g. no OPENAI_API_KEY and no local server configured)
         return _demo_pack(lead)
 
-    url = "https://api.openai.com/v1/chat/completions"
-    model = settings.get("model", "gpt-4o-mini")
     temperature = settings.get("temperature", 0.4)
     max_tokens = settings.get("max_tokens", 450)
-    buzzwords = settings.get("buzzwords", [])
+    system_prompt = build_system_prompt(settings)
+    winners = _variant_winners(settings)
 
     # Try up to 3 times: initial + 2 stricter retries
     for attempt in range(3):
-        prompt = _build_prompt(lead, buzzwords) if attempt == 0 else _build_strict_prompt(lead, buzzwords)
+        prompt = _build_prompt(lead, winners) if attempt == 0 else _build_strict_prompt(lead, winners)
         payload = {
-            "model": model,
             "temperature": temperature,
             "max_tokens": max_tokens,
             "messages": [
-                {"role": "system", "content": "You write concise outreach messages."},
+                {"role": "system", "content": system_prompt},
                 {"role": "user", "content": prompt},
             ],
         }
+        started = time.monotonic()
         try:
-            resp = requests.post(
-                url,
-                headers={
-                    "Authorization": f"Bearer {api_key}",
-                    "Content-Type": "application/json",
+            # Router picks the fastest healthy backend and fails over to the next one
+            data = router.complete(payload, tracker=tracker)
+            content = data["choices"][0]["message"]["content"]
+            pack = MessagePack(**json.loads(content))
+            validate_message_pack(pack, settings)
+        except Exception as exc:
+            logger.debug(
+                "Attempt %d failed for %s: %s",
+                attempt + 1,
+                lead.email,
+                exc,
+                extra={
+                    "lead_email": lead.email,
+                    "attempt": attempt + 1,
+                    "latency_ms": round((time.monotonic() - started) * 1000, 1),
+                    "reason": str(exc),
                 },
-                json=payload,
-                timeout=30,
             )
-            resp.raise_for_status()
-            content = resp.json()["choices"][0]["message"]["content"]
-            data = json.loads(content)
-            pack = MessagePack(**data)
-            validate_message_pack(pack, settings)
-            return pack
-        except Exception:
             if attempt == 2:
                 raise
             continue
+        logger.debug(
+            "Generated %s on attempt %d",
+            lead.email,
+            attempt + 1,
+            extra={
+                "lead_email": lead.email,
+                "attempt": attempt + 1,
+                "latency_ms": round((time.monotonic() - started) * 1000, 1),
+            },
+        )
+        return pack
 
     return _demo_pack(lead)
@@ -0,0 +1,274 @@
+import csv
+import json
+import math
+import os
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+
+# Header aliases seen in Instantly and Airtable result exports (matched case-insensitively)
+RESULT_COLUMNS = {
+    "email": ["email", "lead_email", "lead email"],
+    "variant": ["variant", "email version", "ab variant", "step variant"],
+    "opened": ["opened", "open", "open_count", "open count", "opens"],
+    "replied": ["replied", "reply", "reply_count", "reply count", "replies"],
+    "interested": ["interested", "interest", "lead status interested"],
+}
+
+SEGMENT_FIELDS = ["role", "stage", "industry"]
+
+VARIANTS = ["A", "B"]
+
+_TRUE_VALUES = {"true", "yes", "y", "x", "checked", "opened", "replied", "interested"}
+
+
+def _flag(value: str) -> int:
+    # Airtable exports checkboxes as "checked"/"true"; Instantly exports counts
+    value = (value or "").strip().lower()
+    if not value:
+        return 0
+    if value in _TRUE_VALUES:
+        return 1
+    try:
+        return int(float(value) > 0)
+    except ValueError:
+        return 0
+
+
+def _variant(value: str) -> str:
+    value = (value or "").strip().upper()
+    # Instantly numbers variants from 1
+    if value.isdigit() and 1 <= int(value) <= len(VARIANTS):
+        return VARIANTS[int(value) - 1]
+    return value
+
+
+def _resolve_columns(fieldnames: List[str], path: str) -> Dict[str, str]:
+    lookup = {(name or "").strip().lower(): name for name in fieldnames}
+    resolved = {}
+    for key, aliases in RESULT_COLUMNS.items():
+        for alias in aliases:
+            if alias in lookup:
+                resolved[key] = lookup[alias]
+                break
+    missing = [c for c in ["email", "variant"] if c not in resolved]
+    if missing:
+        raise ValueError(f"{path}: missing required result columns: {missing}")
+    return resolved
+
+
+def load_pack_index(path: str, campaign: Optional[str] = None) -> Tuple[Dict[Tuple[str, str], int], List[Dict]]:
+    # Index (email, variant) -> pack row, from outreach_pack.json or the SQLite sink
+    if not os.path.exists(path):
+        raise ValueError(f"Packs file not found: {path}")
+    rows: List[Dict] = []
+    if path.endswith(".db"):
+        conn = sqlite3.connect(path)
+        conn.row_factory = sqlite3.Row
+        try:
+            campaigns = [r[0] for r in conn.execute("SELECT DISTINCT campaign FROM outreach_packs ORDER BY campaign")]
+            if campaign is None:
+                # The sink can hold several campaigns; joining across them would be ambiguous
+                if len(campaigns) > 1:
+                    raise ValueError(f"{path} holds several campaigns {campaigns}; pass --campaign")
+                campaign = campaigns[0] if campaigns else ""
+            elif campaign not in campaigns:
+                raise ValueError(f"Campaign {campaign!r} not found in {path}")
+            for row in conn.execute(
+                "SELECT email, variant, subject, body, role, stage, industry FROM outreach_packs "
+                "WHERE campaign = ? ORDER BY email, variant",
+                (campaign,),
+            ):
+                rows.append(dict(row))
+        finally:
+            conn.close()
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            items = json.load(f)
+        for item in items:
+            lead, messages = item["lead"], item["messages"]
+            for variant in VARIANTS:
+                rows.append(
+                    {
+                        "email": lead["email"],
+                        "variant": variant,
+                        "subject": messages[f"subject_{variant}"],
+                        "body": messages[f"body_{variant}"],
+                        "role": lead["role"],
+                        "stage": lead["stage"],
+                        "industry": lead["industry"],
+                    }
+                )
+    index = {}
+    for i, row in enumerate(rows):
+        index[(row["email"].strip().lower(), row["variant"])] = i
+    return index, rows
+
+
+def read_result_exports(paths: List[str], index: Dict[Tuple[str, str], int]) -> Dict[str, np.ndarray]:
+    # One entry per (email, variant) send; unmatched records are counted, not joined
+    pack_ids: List[int] = []
+    opened: List[int] = []
+    replied: List[int] = []
+    interested: List[int] = []
+    unmatched = 0
+    for path in paths:
+        with open(path, "r", newline="", encoding="utf-8-sig") as f:
+            reader = csv.DictReader(f)
+            cols = _resolve_columns(reader.fieldnames or [], path)
+            for row in reader:
+                key = ((row.get(cols["email"]) or "").strip().lower(), _variant(row.get(cols["variant"])))
+                pack_id = index.get(key)
+                if pack_id is None:
+                    unmatched += 1
+                    continue
+                pack_ids.append(pack_id)
+                opened.append(_flag(row.get(cols.get("opened", ""), "")))
+                replied.append(_flag(row.get(cols.get("replied", ""), "")))
+                interested.append(_flag(row.get(cols.get("interested", ""), "")))
+    # Several exports (or steps) can describe the same send: keep one record per pack,
+    # flagged if any of its rows was opened/replied/interested
+    pack_id, inverse = np.unique(np.asarray(pack_ids, dtype=np.int64), return_inverse=True)
+    records = {"pack_id": pack_id}
+    for name, values in [("opened", opened), ("replied", replied), ("interested", interested)]:
+        merged = np.zeros(len(pack_id), dtype=np.int64)
+        np.maximum.at(merged, inverse, np.asarray(values, dtype=np.int64))
+        records[name] = merged
+    records["unmatched"] = np.int64(unmatched)
+    records["duplicates"] = np.int64(len(pack_ids) - len(pack_id))
+    return records
+
+
+def _two_proportion_p(
+    x_a: np.ndarray, n_a: np.ndarray, x_b: np.ndarray, n_b: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    # Pooled two-sided z-test for A vs B; segments without data get z=0, p=1
+    with np.errstate(divide="ignore", invalid="ignore"):
+        pooled = (x_a + x_b) / (n_a + n_b)
+        se = np.sqrt(pooled * (1 - pooled) * (1 / n_a + 1 / n_b))
+        z = (x_a / n_a - x_b / n_b) / se
+    z = np.where(np.isfinite(z), z, 0.0)
+    p = np.array([math.erfc(abs(v) / math.sqrt(2)) for v in z], dtype=np.float64)
+    return z, p
+
+
+def compute_variant_stats(
+    records: Dict[str, np.ndarray],
+    pack_rows: List[Dict],
+    segment_by: str = "industry",
+    alpha: float = 0.05,
+    min_sends: int = 30,
+) -> List[Dict]:
+    if segment_by not in SEGMENT_FIELDS:
+        raise ValueError(f"Unsupported segment field: {segment_by}")
+
+    # Encode every pack row once, then gather per record with fancy indexing
+    segment_names, segment_codes = np.unique(
+        np.asarray([row[segment_by] for row in pack_rows] or [""], dtype=object).astype(str), return_inverse=True
+    )
+    variant_codes = np.asarray([VARIANTS.index(row["variant"]) for row in pack_rows] or [0], dtype=np.int64)
+    segments = segment_codes[records["pack_id"]]
+    variants = variant_codes[records["pack_id"]]
+
+    # Group id per (segment, variant); row 0 of each block is the "all" segment
+    n_groups = (len(segment_names) + 1) * len(VARIANTS)
+    group = (segments + 1) * len(VARIANTS) + variants
+    overall = variants
+
+    def _counts(weights=None) -> np.ndarray:
+        counts = np.bincount(group, weights=weights, minlength=n_groups)
+        counts[: len(VARIANTS)] = np.bincount(overall, weights=weights, minlength=len(VARIANTS))
+        return counts.reshape(-1, len(VARIANTS)).astype(np.float64)
+
+    sends = _counts()
+    opens = _counts(records["opened"])
+    replies = _counts(records["replied"])
+    interested = _counts(records["interested"])
+
+    _, open_p = _two_proportion_p(opens[:, 0], sends[:, 0], opens[:, 1], sends[:, 1])
+    reply_z, reply_p = _two_proportion_p(replies[:, 0], sends[:, 0], replies[:, 1], sends[:, 1])
+    with np.errstate(divide="ignore", invalid="ignore"):
+        open_rate = np.nan_to_num(opens / sends)
+        reply_rate = np.nan_to_num(replies / sends)
+        interested_rate = np.nan_to_num(interested / sends)
+
+    names = ["(all)"] + [str(n) for n in segment_names]
+    stats = []
+    for s, name in enumerate(names):
+        significant = reply_p[s] < alpha and sends[s].min() >= min_sends
+        winner = VARIANTS[int(np.argmax(reply_rate[s]))] if significant else ""
+        for v, variant in enumerate(VARIANTS):
+            if not sends[s, v]:
+                continue
+            stats.append(
+                {
+                    "segment_by": segment_by,
+                    "segment": name,
+                    "variant": variant,
+                    "sends": int(sends[s, v]),
+                    "opens": int(opens[s, v]),
+                    "replies": int(replies[s, v]),
+                    "interested": int(interested[s, v]),
+                    "open_rate": round(float(open_rate[s, v]), 4),
+                    "reply_rate": round(float(reply_rate[s, v]), 4),
+                    "interested_rate": round(float(interested_rate[s, v]), 4),
+                    "open_p_value": round(float(open_p[s]), 6),
+                    "reply_z": round(float(reply_z[s]), 4),
+                    "reply_p_value": round(float(reply_p[s]), 6),
+                    "winner": winner,
+                }
+            )
+    return stats
+
+
+def pick_winners(stats: List[Dict], records: Dict[str, np.ndarray], pack_rows: List[Dict]) -> Dict:
+    # Keep one replied example per winning segment/variant as a style reference for generation
+    examples: Dict[Tuple[str, str], Dict] = {}
+    segment_by = stats[0]["segment_by"] if stats else "industry"
+    for pack_id in np.unique(records["pack_id"][records["replied"] > 0]):
+        row = pack_rows[int(pack_id)]
+        examples.setdefault((str(row[segment_by]), row["variant"]), row)
+
+    winners = {}
+    for item in stats:
+        if item["segment"] == "(all)" or item["variant"] != item["winner"]:
+            continue
+        example = examples.get((item["segment"], item["variant"]))
+        if example is None:
+            continue
+        winners[item["segment"]] = {
+            "variant": item["variant"],
+            "reply_rate": item["reply_rate"],
+            "reply_p_value": item["reply_p_value"],
+            "subject": example["subject"],
+        }
+    return {"segment_by": segment_by, "winners": winners}
+
+
+def write_variant_stats_csv(path: str, stats: List[Dict]) -> None:
+    headers = [
+        "segment_by",
+        "segment",
+        "variant",
+        "sends",
+        "opens",
+        "replies",
+        "interested",
+        "open_rate",
+        "reply_rate",
+        "interested_rate",
+        "open_p_value",
+        "reply_z",
+        "reply_p_value",
+        "winner",
+    ]
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=headers)
+        writer.writeheader()
+        writer.writerows(stats)
+
+
+def write_variant_winners(path: str, winners: Dict) -> None:
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(winners, f, indent=2)
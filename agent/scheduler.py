@@ -0,0 +1,40 @@
+from typing import Dict, List
+from .schemas import Lead
+
+
+PRIORITY_FIELDS = ["role", "stage", "industry"]
+
+
+def _rule_values(rule: Dict) -> List[str]:
+    values = rule.get("match", [])
+    if isinstance(values, str):
+        values = [values]
+    return [str(v).strip().lower() for v in values]
+
+
+def _validate_rules(rules: List[Dict]) -> None:
+    for rule in rules:
+        field = rule.get("field")
+        if field not in PRIORITY_FIELDS:
+            raise ValueError(f"Unsupported priority field: {field}")
+        if not _rule_values(rule):
+            raise ValueError(f"Priority rule for {field} has no match values")
+
+
+def score_lead(lead: Lead, rules: List[Dict]) -> float:
+    # Sum the weights of every rule whose field value matches (case-insensitive)
+    score = 0.0
+    for rule in rules:
+        value = getattr(lead, rule["field"]).strip().lower()
+        if value in _rule_values(rule):
+            score += float(rule.get("weight", 1))
+    return score
+
+
+def prioritize_leads(leads: List[Lead], settings: Dict) -> List[Lead]:
+    rules = (settings.get("priority") or {}).get("rules") or []
+    if not rules:
+        return list(leads)
+    _validate_rules(rules)
+    # Stable sort keeps file order within the same priority tier
+    return sorted(leads, key=lambda lead: -score_lead(lead, rules))
@@ -0,0 +1,115 @@
+import logging
+import os
+import queue
+import shutil
+import threading
+import time
+from typing import Callable, Dict, List
+
+
+logger = logging.getLogger("capital_scout")
+
+# Handler exit status for a campaign stopped part-way (same as a Ctrl+C'd one-shot run)
+INTERRUPTED_STATUS = 130
+
+
+class InboxWatcher:
+    # Polls an inbox for new lead CSVs and hands each one to `handler(path, stop_event)` on
+    # worker threads. Files are only picked up once their size is unchanged between two polls,
+    # then moved to inbox/processed or inbox/failed depending on the handler's exit status.
+    # Handlers should return INTERRUPTED_STATUS when stop_event cut them short; those files
+    # stay in the inbox and are reprocessed on the next start.
+    def __init__(
+        self,
+        inbox: str,
+        handler: Callable[[str, threading.Event], int],
+        poll_interval: float = 5.0,
+        workers: int = 1,
+    ):
+        self.inbox = inbox
+        self.handler = handler
+        self.poll_interval = poll_interval
+        self.workers = max(1, int(workers))
+        self.processed_dir = os.path.join(inbox, "processed")
+        self.failed_dir = os.path.join(inbox, "failed")
+        self._queue: queue.Queue = queue.Queue()
+        self._sizes: Dict[str, int] = {}
+        self._queued = set()
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+
+    def _scan(self) -> None:
+        for name in sorted(os.listdir(self.inbox)):
+            path = os.path.join(self.inbox, name)
+            if not name.lower().endswith(".csv") or path in self._queued:
+                continue
+            try:
+                if not os.path.isfile(path):
+                    continue
+                size = os.path.getsize(path)
+            except OSError:
+                # A worker moved the file out between listdir and stat
+                self._sizes.pop(path, None)
+                continue
+            if self._sizes.get(path) == size:
+                # Stable across two polls: the writer has finished the drop
+                del self._sizes[path]
+                self._queued.add(path)
+                self._queue.put(path)
+                logger.info("Queued %s", path)
+            else:
+                self._sizes[path] = size
+
+    def _move(self, path: str, target_dir: str) -> None:
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, os.path.basename(path))
+        if os.path.exists(target):
+            stem, ext = os.path.splitext(os.path.basename(path))
+            target = os.path.join(target_dir, f"{stem}-{int(time.time())}{ext}")
+        shutil.move(path, target)
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            try:
+                path = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                status = self.handler(path, self._stop)
+            except Exception as exc:
+                logger.error("Campaign for %s crashed: %s", path, exc, extra={"reason": str(exc)})
+                status = 1
+            if status == INTERRUPTED_STATUS:
+                logger.warning("Campaign for %s stopped early; leaving it in the inbox", path)
+                self._queue.task_done()
+                continue
+            try:
+                self._move(path, self.processed_dir if status == 0 else self.failed_dir)
+            except OSError as exc:
+                # Leave it marked as queued so the scanner does not reprocess it in a loop
+                logger.error("Could not move %s: %s", path, exc, extra={"reason": str(exc)})
+            else:
+                self._queued.discard(path)
+            self._queue.task_done()
+
+    def start(self) -> None:
+        os.makedirs(self.inbox, exist_ok=True)
+        for i in range(self.workers):
+            t = threading.Thread(target=self._work, name=f"campaign-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self) -> None:
+        self._stop.set()
+        for t in self._threads:
+            t.join()
+        self._threads.clear()
+
+    def run_forever(self) -> None:
+        self.start()
+        try:
+            while not self._stop.is_set():
+                self._scan()
+                self._stop.wait(self.poll_interval)
+        finally:
+            self.stop()
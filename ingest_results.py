@@ -0,0 +1,77 @@
+import argparse
+import os
+import sys
+from rich.console import Console
+
+from agent.logger import setup_logger
+from agent.results import (
+    SEGMENT_FIELDS,
+    compute_variant_stats,
+    load_pack_index,
+    pick_winners,
+    read_result_exports,
+    write_variant_stats_csv,
+    write_variant_winners,
+)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Ingest Instantly/Airtable results and compute A/B variant stats")
+    parser.add_argument("--results", required=True, nargs="+", help="Result export CSV(s)")
+    parser.add_argument(
+        "--packs",
+        default="outputs/outreach_pack.json",
+        help="outreach_pack.json or SQLite sink (.db) the results were sent from",
+    )
+    parser.add_argument("--campaign", help="Campaign to join against when --packs is a SQLite sink")
+    parser.add_argument("--out", default="outputs", help="Output directory")
+    parser.add_argument("--segment-by", default="industry", choices=SEGMENT_FIELDS, help="Lead field to segment by")
+    parser.add_argument("--alpha", type=float, default=0.05, help="Significance level for picking a winner")
+    parser.add_argument("--min-sends", type=int, default=30, help="Minimum sends per variant to pick a winner")
+    args = parser.parse_args()
+
+    os.makedirs(args.out, exist_ok=True)
+    logger = setup_logger(os.path.join(args.out, "logs", "ingest.log"))
+    console = Console()
+    console.print("[bold]Capital Scout AI - results ingestion[/bold]")
+
+    try:
+        index, pack_rows = load_pack_index(args.packs, campaign=args.campaign)
+        logger.info("Indexed %d pack variants from %s", len(index), args.packs)
+        records = read_result_exports(args.results, index)
+    except (OSError, ValueError) as exc:
+        logger.error("Could not read results: %s", exc)
+        console.print(f"[red]{exc}[/red]")
+        return 1
+    logger.info(
+        "Joined %d sends (%d duplicate rows merged, %d unmatched)",
+        len(records["pack_id"]),
+        int(records["duplicates"]),
+        int(records["unmatched"]),
+    )
+
+    stats = compute_variant_stats(
+        records, pack_rows, segment_by=args.segment_by, alpha=args.alpha, min_sends=args.min_sends
+    )
+    winners = pick_winners(stats, records, pack_rows)
+
+    stats_path = os.path.join(args.out, "variant_stats.csv")
+    winners_path = os.path.join(args.out, "variant_winners.json")
+    write_variant_stats_csv(stats_path, stats)
+    write_variant_winners(winners_path, winners)
+    logger.info("Wrote %s", stats_path)
+    logger.info("Wrote %s (%d winning segments)", winners_path, len(winners["winners"]))
+
+    for item in stats:
+        if item["segment"] == "(all)":
+            console.print(
+                f"Variant {item['variant']}: {item['sends']} sends, "
+                f"open {item['open_rate']:.1%}, reply {item['reply_rate']:.1%}, p={item['reply_p_value']:.4f}"
+            )
+
+    console.print("[green]Done[/green]")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
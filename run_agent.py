@@ -1,20 +1,29 @@
 import argparse
 import os
 import sys
+import threading
+import time
+from collections import OrderedDict
 import yaml
 from dotenv import load_dotenv
 from rich.console import Console
 
 from agent.lead_source import read_leads_csv, write_clean_csv
+from agent.backends import UsageTracker, build_router
 from agent.message_gen import generate_message_pack
+from agent.scheduler import prioritize_leads
 from agent.artifacts import (
     ensure_dirs,
     write_outreach_pack,
+    write_outreach_parquet,
+    write_outreach_sqlite,
     write_instantly_csv,
     write_airtable_csv,
     write_campaign_plan,
+    write_run_metrics,
 )
 from agent.logger import setup_logger
+from agent.watcher import INTERRUPTED_STATUS, InboxWatcher
 
 
 def load_settings(path: str) -> dict:
@@ -22,60 +31,290 @@ def load_settings(path: str) -> dict:
         return yaml.safe_load(f)
 
 
+def _run_metrics(campaign: str, leads, generated, router, tracker) -> dict:
+    metrics = {
+        "campaign": campaign,
+        "leads_total": len(leads),
+        "leads_generated": len(generated),
+    }
+    if router is not None:
+        metrics.update(router.metrics(tracker))
+    return metrics
+
+
+def _write_artifacts(
+    out_dir: str, campaign: str, leads, packs, logger, metrics: dict, exports: dict, partial: bool = False
+) -> None:
+    # Leads arrive in priority order, so a partial flush keeps the most valuable packs first
+    if partial:
+        logger.warning("Flushing partial artifacts for %d leads", len(leads))
+
+    outreach_path = os.path.join(out_dir, "outreach_pack.json")
+    instantly_path = os.path.join(out_dir, "instantly_import.csv")
+    airtable_path = os.path.join(out_dir, "airtable_import.csv")
+    plan_path = os.path.join(out_dir, "campaign_plan.md")
+
+    write_outreach_pack(outreach_path, leads, packs)
+    write_instantly_csv(instantly_path, leads, packs)
+    write_airtable_csv(airtable_path, leads, packs)
+    write_campaign_plan(plan_path, campaign)
+    write_run_metrics(os.path.join(out_dir, "run_metrics.json"), metrics)
+
+    if exports.get("parquet"):
+        if write_outreach_parquet(os.path.join(out_dir, "outreach_pack.parquet"), campaign, leads, packs):
+            logger.info("Wrote outreach_pack.parquet")
+        else:
+            logger.warning("Parquet export skipped: pyarrow is not installed")
+    if exports.get("sqlite"):
+        sqlite_path = os.path.join(out_dir, exports["sqlite"])
+        write_outreach_sqlite(sqlite_path, campaign, leads, packs)
+        logger.info("Wrote SQLite sink: %s", sqlite_path)
+
+    logger.info("Wrote outreach_pack.json")
+    logger.info("Wrote Instantly import CSV")
+    logger.info("Wrote Airtable import CSV")
+    logger.info("Wrote campaign plan")
+    if "prompt_tokens" in metrics:
+        logger.info(
+            "Prompt tokens: %d (cached %d, ratio %.1f%%)",
+            metrics["prompt_tokens"],
+            metrics["cached_tokens"],
+            metrics["cached_token_ratio"] * 100,
+        )
+
+
+class PackCache:
+    # LRU of generated packs keyed on lead fields plus a version (the variant winners
+    # file mtime), shared across campaigns in watch mode
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, lead, version=None):
+        key = (version,) + tuple(lead.model_dump().values())
+        with self._lock:
+            pack = self._items.get(key)
+            if pack is not None:
+                self._items.move_to_end(key)
+        return pack
+
+    def put(self, lead, pack, version=None) -> None:
+        key = (version,) + tuple(lead.model_dump().values())
+        with self._lock:
+            self._items[key] = pack
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+
+def _winners_version(settings: dict):
+    # A re-ingest rewrites variant_winners.json, which changes the prompt hint for repeat leads
+    path = settings.get("variant_winners")
+    if not path or not os.path.exists(path):
+        return None
+    return os.path.getmtime(path)
+
+
+def _positive_int(value: str) -> int:
+    try:
+        number = int(value)
+    except ValueError:
+        number = 0
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be a positive integer, got {value!r}")
+    return number
+
+
+def _reserve_campaign(out_dir: str, stem: str) -> str:
+    # Claim <out>/<stem>/ atomically; a later drop with the same file name gets the same
+    # timestamp suffix InboxWatcher uses for processed files instead of overwriting it
+    os.makedirs(out_dir, exist_ok=True)
+    candidates = [stem, f"{stem}-{int(time.time())}"]
+    for attempt in range(1, 100):
+        candidates.append(f"{stem}-{int(time.time())}-{attempt}")
+    for campaign in candidates:
+        try:
+            os.mkdir(os.path.join(out_dir, campaign))
+        except FileExistsError:
+            continue
+        return campaign
+    raise RuntimeError(f"Could not find a free campaign name for {stem}")
+
+
+def run_campaign(
+    input_path: str,
+    out_dir: str,
+    campaign: str,
+    settings: dict,
+    logger,
+    dry_run: bool = False,
+    router=None,
+    max_leads=None,
+    cache=None,
+    stop_event=None,
+) -> int:
+    ensure_dirs(out_dir)
+    progress_every = max(1, int((settings.get("logging") or {}).get("progress_every", 100)))
+
+    logger.info("Loading leads from %s", input_path)
+    leads = read_leads_csv(input_path)
+    logger.info("Loaded %d leads", len(leads))
+
+    clean_path = os.path.join(out_dir, "leads_clean.csv")
+    write_clean_csv(clean_path, leads)
+    logger.info("Wrote cleaned leads: %s", clean_path)
+
+    leads = prioritize_leads(leads, settings)
+    if max_leads is not None:
+        leads = leads[:max_leads]
+        logger.info("Limiting run to top %d leads by priority", len(leads))
+
+    # Count only this campaign's requests; in watch mode the router is shared
+    tracker = UsageTracker() if router is not None else None
+    packs = {}
+    generated = []
+    status = 0
+    try:
+        started = time.monotonic()
+        for lead in leads:
+            if stop_event is not None and stop_event.is_set():
+                # Watch mode is shutting down: flush what we have and let the file be reprocessed
+                logger.warning("Stopping after %d of %d leads", len(generated), len(leads))
+                status = INTERRUPTED_STATUS
+                break
+            # Per-lead lines stay at DEBUG; INFO gets a constant-rate progress roll-up
+            logger.debug("Generating messages for %s", lead.email, extra={"lead_email": lead.email})
+            version = _winners_version(settings) if cache is not None else None
+            pack = cache.get(lead, version) if cache is not None else None
+            if pack is None:
+                try:
+                    pack = generate_message_pack(lead, settings, dry_run=dry_run, router=router, tracker=tracker)
+                except Exception as exc:
+                    logger.error(
+                        "Generation failed for %s: %s",
+                        lead.email,
+                        exc,
+                        extra={"lead_email": lead.email, "reason": str(exc)},
+                    )
+                    status = 1
+                    break
+                if cache is not None:
+                    cache.put(lead, pack, version)
+            packs[lead.email] = pack
+            generated.append(lead)
+            if len(generated) % progress_every == 0 or len(generated) == len(leads):
+                elapsed = time.monotonic() - started
+                logger.info(
+                    "Generated %d/%d leads (%.1f leads/s)",
+                    len(generated),
+                    len(leads),
+                    len(generated) / elapsed if elapsed else 0.0,
+                )
+    except KeyboardInterrupt:
+        logger.warning("Run interrupted after %d of %d leads", len(generated), len(leads))
+        status = INTERRUPTED_STATUS
+
+    metrics = _run_metrics(campaign, leads, generated, router, tracker)
+    exports = settings.get("exports") or {}
+    _write_artifacts(out_dir, campaign, generated, packs, logger, metrics, exports, partial=status != 0)
+    if status:
+        return status
+
+    if dry_run:
+        logger.info("Dry run mode enabled. No external sends performed.")
+    return 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(description="Capital Scout AI outreach agent")
-    parser.add_argument("--input", required=True, help="Path to leads CSV")
+    parser.add_argument("--input", help="Path to leads CSV")
     parser.add_argument("--out", required=True, help="Output directory")
-    parser.add_argument("--campaign", required=True, help="Campaign name")
+    parser.add_argument("--campaign", help="Campaign name")
     parser.add_argument("--dry-run", action="store_true", help="Generate files only")
     parser.add_argument("--config", default="config.yaml", help="Config YAML path")
+    parser.add_argument("--max-leads", type=_positive_int, default=None, help="Only generate the top N leads by priority")
+    parser.add_argument(
+        "--watch",
+        metavar="INBOX",
+        help="Keep running and process every new CSV dropped in INBOX as its own campaign",
+    )
     args = parser.parse_args()
+    if not args.watch and (not args.input or not args.campaign):
+        parser.error("--input and --campaign are required unless --watch is used")
 
     load_dotenv()
     settings = load_settings(args.config)
 
     ensure_dirs(args.out)
     log_path = os.path.join(args.out, "logs", "run.log")
-    logger = setup_logger(log_path)
+    log_settings = settings.get("logging") or {}
+    logger = setup_logger(
+        log_path,
+        max_bytes=int(log_settings.get("max_bytes", 10 * 1024 * 1024)),
+        backup_count=int(log_settings.get("backup_count", 5)),
+        json_format=bool(log_settings.get("json", False)),
+        queue_size=int(log_settings.get("queue_size", 10000)),
+        level=str(log_settings.get("level", "INFO")),
+    )
 
     console = Console()
     console.print("[bold]Capital Scout AI[/bold]")
 
-    logger.info("Loading leads from %s", args.input)
-    leads = read_leads_csv(args.input)
-    logger.info("Loaded %d leads", len(leads))
+    # One router per process: pooled HTTP sessions, concurrency slots and rate limits are shared
+    router = None if args.dry_run else build_router(settings)
+    if router is not None:
+        logger.info("Generation backends: %s", ", ".join(b.name for b in router.backends))
 
-    clean_path = os.path.join(args.out, "leads_clean.csv")
-    write_clean_csv(clean_path, leads)
-    logger.info("Wrote cleaned leads: %s", clean_path)
+    if args.watch:
+        watch_settings = settings.get("watch") or {}
+        cache = PackCache(int(watch_settings.get("cache_size", 50000)))
 
-    packs = {}
-    for lead in leads:
-        logger.info("Generating messages for %s", lead.email)
-        try:
-            pack = generate_message_pack(lead, settings, dry_run=args.dry_run)
-            packs[lead.email] = pack
-        except Exception as exc:
-            logger.error("Generation failed for %s: %s", lead.email, exc)
-            return 1
-
-    outreach_path = os.path.join(args.out, "outreach_pack.json")
-    instantly_path = os.path.join(args.out, "instantly_import.csv")
-    airtable_path = os.path.join(args.out, "airtable_import.csv")
-    plan_path = os.path.join(args.out, "campaign_plan.md")
-
-    write_outreach_pack(outreach_path, leads, packs)
-    write_instantly_csv(instantly_path, leads, packs)
-    write_airtable_csv(airtable_path, leads, packs)
-    write_campaign_plan(plan_path, args.campaign)
+        def handle(path: str, stop_event) -> int:
+            # Campaign name comes from the file name; outputs go to <out>/<campaign>/
+            campaign = _reserve_campaign(args.out, os.path.splitext(os.path.basename(path))[0])
+            logger.info("Starting campaign %s from %s", campaign, path)
+            status = run_campaign(
+                path,
+                os.path.join(args.out, campaign),
+                campaign,
+                settings,
+                logger,
+                dry_run=args.dry_run,
+                router=router,
+                max_leads=args.max_leads,
+                cache=cache,
+                stop_event=stop_event,
+            )
+            logger.info("Finished campaign %s (exit %d)", campaign, status)
+            return status
 
-    logger.info("Wrote outreach_pack.json")
-    logger.info("Wrote Instantly import CSV")
-    logger.info("Wrote Airtable import CSV")
-    logger.info("Wrote campaign plan")
+        watcher = InboxWatcher(
+            args.watch,
+            handle,
+            poll_interval=float(watch_settings.get("poll_interval", 5)),
+            workers=int(watch_settings.get("workers", 1)),
+        )
+        console.print(f"Watching {args.watch} for lead CSVs (Ctrl+C to stop)")
+        logger.info("Watching %s for lead CSVs", args.watch)
+        try:
+            watcher.run_forever()
+        except KeyboardInterrupt:
+            logger.info("Watch mode stopped")
+        console.print("[green]Stopped[/green]")
+        return 0
 
-    if args.dry_run:
-        logger.info("Dry run mode enabled. No external sends performed.")
+    status = run_campaign(
+        args.input,
+        args.out,
+        args.campaign,
+        settings,
+        logger,
+        dry_run=args.dry_run,
+        router=router,
+        max_leads=args.max_leads,
+    )
+    if status:
+        return status
 
     console.print("[green]Done[/green]")
     return 0
@@ -0,0 +1,155 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from agent.backends import BackendBusy, BackendError, BackendRouter, ChatBackend, UsageTracker
+
+
+def _start_stub(status: int):
+    # Minimal OpenAI-compatible /chat/completions server returning `status`
+    seen = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            seen.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            body = b""
+            if status == 200:
+                body = json.dumps(
+                    {
+                        "choices": [{"message": {"content": "{}"}}],
+                        "usage": {"prompt_tokens": 100, "prompt_tokens_details": {"cached_tokens": 60}},
+                    }
+                ).encode()
+            self.send_response(status)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, seen
+
+
+@pytest.fixture
+def stubs():
+    bad, bad_seen = _start_stub(503)
+    good, good_seen = _start_stub(200)
+    yield (bad, bad_seen), (good, good_seen)
+    bad.shutdown()
+    good.shutdown()
+
+
+def _backend(name, server, **kwargs):
+    host, port = server.server_address
+    return ChatBackend(name=name, base_url=f"http://{host}:{port}/v1", model=f"{name}-model", **kwargs)
+
+
+def test_failover_to_healthy_backend_and_counters(stubs):
+    (bad, bad_seen), (good, good_seen) = stubs
+    router = BackendRouter([_backend("bad", bad, timeout=5), _backend("good", good, timeout=5)])
+
+    for _ in range(3):
+        data = router.complete({"messages": []})
+        assert data["choices"][0]["message"]["content"] == "{}"
+
+    # The failing backend is tried once, then ranked behind the healthy one
+    assert len(bad_seen) == 1
+    assert len(good_seen) == 3
+    assert good_seen[0]["model"] == "good-model"
+
+    bad_backend, good_backend = router.backends
+    assert (bad_backend.requests, bad_backend.errors, bad_backend.consecutive_failures) == (1, 1, 1)
+    assert (good_backend.requests, good_backend.errors) == (3, 0)
+    assert bad_backend.score() > good_backend.score()
+
+    metrics = router.metrics()
+    assert metrics["prompt_tokens"] == 300
+    assert metrics["cached_tokens"] == 180
+    assert metrics["cached_token_ratio"] == 0.6
+
+
+def test_repeated_failures_trigger_cooldown(stubs):
+    (bad, _), _ = stubs
+    backend = _backend("bad", bad, timeout=5, cooldown=60)
+    router = BackendRouter([backend])
+
+    # A single failure only lowers the backend's score
+    with pytest.raises(BackendError):
+        router.complete({"messages": []})
+    assert backend.consecutive_failures == 1
+    assert not backend.in_cooldown(time.monotonic())
+
+    with pytest.raises(BackendError):
+        router.complete({"messages": []})
+    assert backend.consecutive_failures == 2
+    assert backend.in_cooldown(time.monotonic())
+
+
+def test_concurrency_limit_raises_busy(stubs):
+    _, (good, good_seen) = stubs
+    backend = _backend("good", good, max_concurrency=1)
+
+    backend._slots.acquire()
+    try:
+        with pytest.raises(BackendBusy):
+            backend.complete({"messages": []})
+    finally:
+        backend._slots.release()
+
+    assert good_seen == []
+    backend.complete({"messages": []})
+    assert len(good_seen) == 1
+
+
+def test_usage_tracker_counts_only_its_own_run(stubs):
+    _, (good, _) = stubs
+    router = BackendRouter([_backend("good", good)])
+    first, second = UsageTracker(), UsageTracker()
+
+    for _ in range(3):
+        router.complete({"messages": []}, tracker=first)
+    router.complete({"messages": []}, tracker=second)
+
+    assert router.metrics()["prompt_tokens"] == 400
+    metrics = router.metrics(second)
+    assert metrics["backends"][0]["requests"] == 1
+    assert metrics["prompt_tokens"] == 100
+    assert metrics["cached_token_ratio"] == 0.6
+
+
+def test_busy_backend_does_not_consume_rate_limit_tokens(stubs):
+    _, (good, _) = stubs
+    backend = _backend("good", good, max_concurrency=1, requests_per_minute=60)
+
+    backend._slots.acquire()
+    try:
+        with pytest.raises(BackendBusy):
+            backend.complete({"messages": []})
+    finally:
+        backend._slots.release()
+
+    # The single burst token is still available for the next call
+    backend.complete({"messages": []})
+    assert backend.requests == 1
+
+
+def test_busy_healthy_backend_is_preferred_over_cooling_one(stubs):
+    (bad, bad_seen), (good, good_seen) = stubs
+    cooling = _backend("bad", bad, cooldown=60)
+    healthy = _backend("good", good, max_concurrency=1)
+    cooling.cooldown_until = time.monotonic() + 60
+    router = BackendRouter([cooling, healthy])
+
+    # Hold the healthy backend's only slot briefly, as a concurrent campaign would
+    healthy._slots.acquire()
+    threading.Timer(0.2, healthy._slots.release).start()
+    router.complete({"messages": []})
+
+    assert bad_seen == []
+    assert len(good_seen) == 1
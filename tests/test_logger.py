@@ -0,0 +1,35 @@
+import json
+import threading
+
+from agent.logger import _listeners, setup_logger, shutdown_logger
+
+
+def test_full_queue_drops_debug_but_keeps_errors(tmp_path):
+    log_path = tmp_path / "logs" / "run.log"
+    logger = setup_logger(str(log_path), json_format=True, queue_size=5, level="DEBUG")
+
+    # Stall the writer thread so the queue is guaranteed to fill up
+    file_handler = _listeners[logger.name].handlers[0]
+    release = threading.Event()
+    handle = file_handler.handle
+    file_handler.handle = lambda record: release.wait() and handle(record)
+    threading.Timer(0.3, release.set).start()
+
+    for i in range(2000):
+        logger.debug("noise %d", i)
+    logger.error("Generation failed for %s", "a@x.com", extra={"lead_email": "a@x.com", "reason": "boom"})
+    shutdown_logger(logger)
+
+    records = [json.loads(line) for line in log_path.read_text(encoding="utf-8").splitlines()]
+    errors = [r for r in records if r["level"] == "ERROR"]
+    assert errors == [
+        {
+            "ts": errors[0]["ts"],
+            "level": "ERROR",
+            "message": "Generation failed for a@x.com",
+            "lead_email": "a@x.com",
+            "reason": "boom",
+        }
+    ]
+    assert len(records) < 2000
+    assert records[-1]["message"].startswith("Dropped ")
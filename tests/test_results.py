@@ -0,0 +1,191 @@
+import csv
+import json
+import math
+
+import numpy as np
+import pytest
+
+from agent.results import (
+    _resolve_columns,
+    _two_proportion_p,
+    compute_variant_stats,
+    load_pack_index,
+    pick_winners,
+    read_result_exports,
+)
+
+
+def _write_packs(path, leads):
+    # leads: list of (email, industry)
+    items = []
+    for email, industry in leads:
+        items.append(
+            {
+                "lead": {"email": email, "role": "Founder", "stage": "Seed", "industry": industry},
+                "messages": {
+                    "subject_A": f"A for {email}",
+                    "body_A": "a",
+                    "subject_B": f"B for {email}",
+                    "body_B": "b",
+                    "followup_1": "",
+                    "followup_2": "",
+                },
+            }
+        )
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(items, f)
+
+
+def _write_results(path, header, rows):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
+
+
+def _by_key(stats):
+    return {(s["segment"], s["variant"]): s for s in stats}
+
+
+def test_two_proportion_p_matches_known_values():
+    # 30/100 vs 20/100: pooled 0.25, se = sqrt(0.25 * 0.75 * 0.02)
+    z, p = _two_proportion_p(
+        np.array([30.0, 0.0]), np.array([100.0, 0.0]), np.array([20.0, 0.0]), np.array([100.0, 0.0])
+    )
+    expected_z = 0.1 / math.sqrt(0.25 * 0.75 * 0.02)
+    assert z[0] == pytest.approx(expected_z)
+    assert p[0] == pytest.approx(math.erfc(expected_z / math.sqrt(2)))
+    assert p[0] == pytest.approx(0.1025, abs=1e-4)
+    # No data: z=0, p=1 instead of NaN
+    assert (z[1], p[1]) == (0.0, 1.0)
+
+
+def test_resolve_columns_accepts_airtable_and_instantly_headers():
+    airtable = _resolve_columns(["Name", "Email", "Email Version", "Opened", "Replied", "Interested"], "a.csv")
+    assert airtable == {
+        "email": "Email",
+        "variant": "Email Version",
+        "opened": "Opened",
+        "replied": "Replied",
+        "interested": "Interested",
+    }
+    instantly = _resolve_columns(["lead_email", "Variant", "open_count", "reply_count"], "i.csv")
+    assert instantly == {"email": "lead_email", "variant": "Variant", "opened": "open_count", "replied": "reply_count"}
+    with pytest.raises(ValueError, match="variant"):
+        _resolve_columns(["Email", "Opened"], "bad.csv")
+
+
+def test_read_result_exports_joins_by_email_and_variant(tmp_path):
+    packs = tmp_path / "packs.json"
+    _write_packs(packs, [("a@x.com", "AI"), ("b@x.com", "AI")])
+    index, _ = load_pack_index(str(packs))
+
+    results = tmp_path / "instantly.csv"
+    # Instantly numbers variants from 1 and exports counts; emails are matched case-insensitively
+    _write_results(
+        results,
+        ["Lead Email", "Variant", "Open Count", "Reply Count"],
+        [["A@X.COM", "1", "3", "0"], ["b@x.com", "2", "0", "1"], ["nobody@x.com", "1", "1", "1"]],
+    )
+    records = read_result_exports([str(results)], index)
+
+    assert records["pack_id"].tolist() == [index[("a@x.com", "A")], index[("b@x.com", "B")]]
+    assert records["opened"].tolist() == [1, 0]
+    assert records["replied"].tolist() == [0, 1]
+    assert int(records["unmatched"]) == 1
+
+
+def test_duplicate_exports_count_each_send_once(tmp_path):
+    packs = tmp_path / "packs.json"
+    leads = [(f"f{i}@x.com", "FinTech") for i in range(2)] + [(f"h{i}@x.com", "Health") for i in range(4)]
+    _write_packs(packs, leads)
+    index, pack_rows = load_pack_index(str(packs))
+
+    rows = []
+    for email, industry in leads:
+        # Variant A replies for every FinTech lead; B never replies
+        rows.append([email, "A", "checked", "checked" if industry == "FinTech" else "", ""])
+        rows.append([email, "B", "", "", ""])
+    airtable = tmp_path / "airtable.csv"
+    _write_results(airtable, ["Email", "Email Version", "Opened", "Replied", "Interested"], rows)
+
+    single = read_result_exports([str(airtable)], index)
+    doubled = read_result_exports([str(airtable), str(airtable)], index)
+
+    assert int(doubled["duplicates"]) == len(rows)
+    for key in ["pack_id", "opened", "replied", "interested"]:
+        assert doubled[key].tolist() == single[key].tolist()
+
+    stats = _by_key(compute_variant_stats(doubled, pack_rows, min_sends=1))
+    assert stats[("(all)", "A")]["sends"] == 6
+    assert stats[("(all)", "A")]["replies"] == 2
+    assert stats[("(all)", "B")]["replies"] == 0
+    # 2/6 vs 0/6: pooled 1/6, se = sqrt(1/6 * 5/6 * 2/6)
+    expected_z = (2 / 6) / math.sqrt((1 / 6) * (5 / 6) * (2 / 6))
+    assert stats[("(all)", "A")]["reply_z"] == pytest.approx(expected_z, abs=1e-4)
+    assert stats[("(all)", "A")]["reply_p_value"] == pytest.approx(
+        math.erfc(expected_z / math.sqrt(2)), abs=1e-6
+    )
+    # FinTech 2/2 vs 0/2 (not 4/4 vs 0/4): z = 2, p = 0.0455
+    assert stats[("FinTech", "A")]["sends"] == 2
+    assert stats[("FinTech", "A")]["reply_z"] == pytest.approx(2.0)
+    assert stats[("FinTech", "A")]["reply_p_value"] == pytest.approx(0.0455, abs=1e-4)
+
+
+def test_compute_variant_stats_groups_segments_and_all_block():
+    pack_rows = []
+    for email, industry in [("a", "AI"), ("b", "AI"), ("c", "Bio")]:
+        for variant in "AB":
+            pack_rows.append(
+                {"email": email, "variant": variant, "industry": industry, "subject": f"{variant}-{email}"}
+            )
+    records = {
+        "pack_id": np.arange(6),
+        # a/A, a/B, b/A, b/B, c/A, c/B
+        "opened": np.array([1, 1, 1, 0, 0, 1]),
+        "replied": np.array([1, 0, 0, 0, 0, 1]),
+        "interested": np.array([0, 0, 0, 0, 0, 1]),
+    }
+    stats = _by_key(compute_variant_stats(records, pack_rows, min_sends=1))
+
+    assert set(stats) == {(seg, v) for seg in ["(all)", "AI", "Bio"] for v in "AB"}
+    assert [stats[("(all)", v)]["sends"] for v in "AB"] == [3, 3]
+    assert [stats[("(all)", v)]["opens"] for v in "AB"] == [2, 2]
+    assert [stats[("AI", v)]["sends"] for v in "AB"] == [2, 2]
+    assert [stats[("AI", v)]["opens"] for v in "AB"] == [2, 1]
+    assert stats[("AI", "A")]["reply_rate"] == 0.5
+    assert stats[("Bio", "B")]["interested_rate"] == 1.0
+    # Segment sums match the "(all)" block
+    for metric in ["sends", "opens", "replies", "interested"]:
+        for v in "AB":
+            assert stats[("(all)", v)][metric] == stats[("AI", v)][metric] + stats[("Bio", v)][metric]
+
+
+def test_pick_winners_requires_significance_and_min_sends():
+    pack_rows = []
+    for i in range(40):
+        for variant in "AB":
+            pack_rows.append(
+                {"email": f"l{i}", "variant": variant, "industry": "FinTech", "subject": f"{variant} subject {i}"}
+            )
+    # A replies 20/40, B replies 2/40
+    replied = np.array([1 if (v == 0 and i < 20) or (v == 1 and i < 2) else 0 for i in range(40) for v in range(2)])
+    records = {
+        "pack_id": np.arange(80),
+        "opened": replied,
+        "replied": replied,
+        "interested": np.zeros(80, dtype=np.int64),
+    }
+
+    stats = compute_variant_stats(records, pack_rows, min_sends=30)
+    winners = pick_winners(stats, records, pack_rows)
+    assert winners["segment_by"] == "industry"
+    assert list(winners["winners"]) == ["FinTech"]
+    winner = winners["winners"]["FinTech"]
+    assert winner["variant"] == "A"
+    assert winner["reply_rate"] == 0.5
+    assert winner["subject"] == "A subject 0"
+
+    # Same data but too few sends per variant: no winner
+    stats = compute_variant_stats(records, pack_rows, min_sends=41)
+    assert pick_winners(stats, records, pack_rows)["winners"] == {}
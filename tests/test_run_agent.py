@@ -0,0 +1,12 @@
+import argparse
+
+import pytest
+
+from run_agent import _positive_int
+
+
+def test_positive_int_rejects_zero_negative_and_text():
+    assert _positive_int("50") == 50
+    for value in ["0", "-3", "abc"]:
+        with pytest.raises(argparse.ArgumentTypeError):
+            _positive_int(value)
@@ -0,0 +1,88 @@
+import json
+import logging
+import os
+import threading
+import time
+
+from agent.watcher import INTERRUPTED_STATUS, InboxWatcher
+from run_agent import _reserve_campaign, run_campaign
+
+LEADS_CSV = """first_name,last_name,role,company,industry,stage,email
+Alex,Chen,Founder,Stealth AI,AI Infrastructure,Seed,alex@stealthai.com
+Sarah,Miller,Founder,FinFlow,FinTech,Seed,sarah@finflow.co
+Daniel,Park,Investor,NorthBridge,Venture Capital,Series A+,daniel@nbcapital.vc
+"""
+
+
+class _StopAfter:
+    # Stop event that reports set after `n` checks
+    def __init__(self, n: int):
+        self.checks = 0
+        self.n = n
+
+    def is_set(self) -> bool:
+        self.checks += 1
+        return self.checks > self.n
+
+
+def test_run_campaign_stops_with_partial_flush(tmp_path):
+    leads = tmp_path / "leads.csv"
+    leads.write_text(LEADS_CSV, encoding="utf-8")
+    out = tmp_path / "out"
+
+    status = run_campaign(
+        str(leads),
+        str(out),
+        "drop",
+        {},
+        logging.getLogger("test_watcher"),
+        dry_run=True,
+        stop_event=_StopAfter(2),
+    )
+
+    assert status == INTERRUPTED_STATUS
+    with open(out / "outreach_pack.json", encoding="utf-8") as f:
+        assert len(json.load(f)) == 2
+    with open(out / "run_metrics.json", encoding="utf-8") as f:
+        assert json.load(f)["leads_generated"] == 2
+
+
+def test_stop_interrupts_running_campaign_and_keeps_file(tmp_path):
+    inbox = tmp_path / "inbox"
+    inbox.mkdir()
+    drop = inbox / "big.csv"
+    drop.write_text(LEADS_CSV, encoding="utf-8")
+    started = threading.Event()
+
+    def handler(path, stop_event):
+        # Long campaign that only ends when asked to stop
+        started.set()
+        while not stop_event.is_set():
+            time.sleep(0.01)
+        return INTERRUPTED_STATUS
+
+    watcher = InboxWatcher(str(inbox), handler, poll_interval=0.05)
+    thread = threading.Thread(target=watcher.run_forever)
+    thread.start()
+    assert started.wait(5)
+
+    stopping = time.monotonic()
+    watcher.stop()
+    thread.join(5)
+
+    assert not thread.is_alive()
+    assert time.monotonic() - stopping < 2
+    assert drop.exists()
+    assert not os.path.exists(inbox / "processed" / "big.csv")
+    assert not os.path.exists(inbox / "failed" / "big.csv")
+
+
+def test_reserve_campaign_never_reuses_an_existing_output_dir(tmp_path):
+    first = _reserve_campaign(str(tmp_path), "leads")
+    second = _reserve_campaign(str(tmp_path), "leads")
+    third = _reserve_campaign(str(tmp_path), "leads")
+
+    assert first == "leads"
+    assert second.startswith("leads-") and third.startswith("leads-")
+    assert len({first, second, third}) == 3
+    assert all((tmp_path / name).is_dir() for name in [first, second, third])